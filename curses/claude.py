@@ -1,18 +1,535 @@
 #!/usr/bin/env python3
 import curses
+import errno
+import mmap
 import os
 import sys
-import pyperclip
-from pygments import highlight
-from pygments.lexers import PythonLexer
-from pygments.formatters import Terminal256Formatter
-from pygments.styles import get_style_by_name
+import tempfile
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from curses import (
+    KEY_BACKSPACE, KEY_DC, KEY_DOWN, KEY_END, KEY_HOME, KEY_LEFT, KEY_NPAGE,
+    KEY_PPAGE, KEY_RESIZE, KEY_RIGHT, KEY_SF, KEY_SR, KEY_UP,
+)
+from itertools import accumulate, count
+from operator import add
+
+# Maximum number of decoded lines kept between renders
+LINE_CACHE_SIZE = 4096
+# Maximum number of highlighted lines kept between renders
+HIGHLIGHT_CACHE_SIZE = 1024
+# Lexer state a file starts in
+ROOT_STATE = ('root',)
+# Furthest the lexer walks forward from the last lexed line to find a line's
+# starting state; beyond that the line is assumed to start at the top level
+HIGHLIGHT_SYNC_LINES = 500
+
+# Inserted for Tab, and in place of tabs in pasted text, since cursor columns count characters
+TAB_SPACES = ' ' * 4
+
+# Lines common enough in Python code to highlight before they are first seen
+COMMON_PYTHON_LINES = tuple(
+    indent + statement
+    for indent in ('', '    ', '        ', '            ')
+    for statement in ('', 'pass', 'else:', 'try:', 'finally:', 'return', 'return None',
+                      'return True', 'return False', 'return self', 'break', 'continue',
+                      'raise', 'except Exception:', 'except Exception as e:', ')', '])',
+                      '}', '):', '"""', 'def __init__(self):', 'super().__init__()',
+                      'import os', 'import sys', 'if __name__ == "__main__":', 'main()')
+)
+
+# Files at least this large are mapped instead of read into memory
+MMAP_SIZE = 64 << 20
+# Bytes of text split at a time when indexing newlines
+SCAN_CHUNK_SIZE = 1 << 20
+# Largest slice handed to a single write when saving
+WRITE_CHUNK_SIZE = 1 << 16
+# Most slices gathered into one writev call when saving
+WRITEV_BATCH = 1024
+# Saves at least this large reserve their disk space before writing
+PREALLOCATE_SIZE = 10 << 20
+# Process umask, for the mode of new files. Reading it means setting it, and
+# the umask is process-wide, so it is read once here before any thread starts
+UMASK = os.umask(0)
+os.umask(UMASK)
+
+# How often to check on background file I/O while waiting for a key (ms)
+IO_POLL_MS = 50
+
+# DEC private mode 2026 brackets a frame so the terminal paints it atomically
+SYNC_BEGIN = "\x1b[?2026h"
+SYNC_END = "\x1b[?2026l"
+# Terminals known to support synchronized output when terminfo lacks the Sync capability
+SYNC_TERMS = ('kitty', 'foot', 'alacritty', 'wezterm', 'contour', 'ghostty')
+
+# Channel intensities of the 6x6x6 color cube in the xterm 256-color palette
+CUBE_LEVELS = (0x00, 0x5f, 0x87, 0xaf, 0xd7, 0xff)
+
+def xterm_color(hex_color):
+    # Nearest xterm 256-color index for an 'rrggbb' color, from the cube or the gray ramp
+    rgb = tuple(int(hex_color[i:i + 2], 16) for i in (0, 2, 4))
+    levels = [min(range(6), key=lambda i: abs(CUBE_LEVELS[i] - v)) for v in rgb]
+    cube = tuple(CUBE_LEVELS[i] for i in levels)
+    gray = min(23, max(0, (sum(rgb) // 3 - 3) // 10))
+    
+    def distance(color):
+        return sum((a - b) ** 2 for a, b in zip(color, rgb))
+        
+    if distance(cube) <= distance((8 + 10 * gray,) * 3):
+        return 16 + 36 * levels[0] + 6 * levels[1] + levels[2]
+    return 232 + gray
+
+def supports_sync_output():
+    try:
+        if curses.tigetstr('Sync'):
+            return True
+    except curses.error:
+        pass
+    term = os.environ.get('TERM', '')
+    return any(name in term for name in SYNC_TERMS)
+
+def lex_line(lexer, line, stack, token_type, error):
+    # Tokenize one line with a Pygments RegexLexer, starting from the state
+    # stack the previous line ended in. This is the loop from
+    # RegexLexer.get_tokens_unprocessed, kept here so the stack at the end of
+    # the line can be returned along with the (ttype, value) tokens.
+    # token_type and error are pygments.token._TokenType and Error, passed
+    # in so Pygments stays a lazy import.
+    text = line + '\n'
+    end = len(text)
+    tokens = []
+    pos = 0
+    tokendefs = lexer._tokens
+    statestack = list(stack)
+    statetokens = tokendefs[statestack[-1]]
+    while pos < end:
+        for rexmatch, action, new_state in statetokens:
+            m = rexmatch(text, pos)
+            if m:
+                if action is not None:
+                    if type(action) is token_type:
+                        tokens.append((action, m.group()))
+                    else:
+                        tokens.extend((ttype, value) for _, ttype, value in action(lexer, m))
+                pos = m.end()
+                if new_state is not None:
+                    if isinstance(new_state, tuple):
+                        for state in new_state:
+                            if state == '#pop':
+                                if len(statestack) > 1:
+                                    statestack.pop()
+                            elif state == '#push':
+                                statestack.append(statestack[-1])
+                            else:
+                                statestack.append(state)
+                    elif isinstance(new_state, int):
+                        # Pop, but keep at least one state on the stack
+                        if abs(new_state) >= len(statestack):
+                            del statestack[1:]
+                        else:
+                            del statestack[new_state:]
+                    elif new_state == '#push':
+                        statestack.append(statestack[-1])
+                    statetokens = tokendefs[statestack[-1]]
+                break
+        else:
+            if text[pos] == '\n':
+                # Nothing matched the newline; Pygments resets to the top level here
+                statestack = ['root']
+                statetokens = tokendefs['root']
+            else:
+                tokens.append((error, text[pos]))
+            pos += 1
+    return tokens, tuple(statestack)
+
+def writev_all(fd, buffers):
+    # os.writev may write less than asked; resume from the first unwritten byte
+    while buffers:
+        written = os.writev(fd, buffers)
+        for i, buffer in enumerate(buffers):
+            if written < len(buffer):
+                break
+            written -= len(buffer)
+        else:
+            return
+        buffers = [memoryview(buffers[i])[written:]] + buffers[i + 1:]
+
+def write_chunks(fd, chunks):
+    # Gather the chunks into as few system calls as possible
+    if not hasattr(os, 'writev'):
+        with os.fdopen(os.dup(fd), 'wb', buffering=WRITE_CHUNK_SIZE) as f:
+            for chunk in chunks:
+                f.write(chunk)
+        return
+    batch = []
+    for chunk in chunks:
+        batch.append(chunk)
+        if len(batch) == WRITEV_BATCH:
+            writev_all(fd, batch)
+            batch = []
+    writev_all(fd, batch)
+
+# Piece sources
+ORIGINAL = 0
+ADD = 1
+
+# A run of `length` bytes from a source buffer, containing `newlines` line breaks
+Piece = namedtuple('Piece', 'source start length newlines')
+
+class PieceTable:
+    # The document is the concatenation of its pieces, each a slice of either
+    # the read-only original text (the file's bytes, or a mapping of the file
+    # when it is very large) or the append-only add buffer. Edits only split
+    # pieces and append to the add buffer, so the original text is never
+    # copied. Text is stored as UTF-8 bytes; columns are counted in characters
+    # of the decoded line.
+    def __init__(self, original=b""):
+        self._original = original
+        self._add = bytearray()
+        self._sources = (self._original, self._add)
+        # Offsets of every newline byte in each source, packed as 64-bit ints
+        self._newlines = (self._scan_newlines(original), array('q'))
+        self.pieces = []
+        if original:
+            self.pieces.append(Piece(ORIGINAL, 0, len(original), len(self._newlines[ORIGINAL])))
+            
+        # Keep the line ending style of the file for new line breaks
+        self.newline = b'\n'
+        first = self._newlines[ORIGINAL][:1]
+        if first and first[0] > 0 and original[first[0] - 1:first[0]] == b'\r':
+            self.newline = b'\r\n'
+            
+        self.version = 0
+        self._index = None
+        self._lines = {}
+        # (mtime_ns, size) of the file the text was loaded from
+        self.file_stat = None
+        # (st_dev, st_ino) of the file the original text is mapped from, if any
+        self.file_id = None
+        
+    @classmethod
+    def from_file(cls, filename):
+        with open(filename, 'rb') as f:
+            stat = os.fstat(f.fileno())
+            if stat.st_size == 0:
+                table = cls()
+            elif stat.st_size < MMAP_SIZE:
+                # A private copy stays valid whatever happens to the file
+                table = cls(f.read())
+            else:
+                # Mapping avoids holding a copy of a very large file, but the
+                # buffer then depends on the file: if another program
+                # truncates it, reading the missing pages raises SIGBUS, and
+                # a rewrite in place changes the text under the newline index
+                table = cls(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+                table.file_id = (stat.st_dev, stat.st_ino)
+        table.file_stat = (stat.st_mtime_ns, stat.st_size)
+        return table
+            
+    def close(self):
+        if isinstance(self._original, mmap.mmap):
+            self._original.close()
+            
+    @staticmethod
+    def _scan_newlines(data, base=0):
+        # Split a chunk at a time and turn the line lengths into newline
+        # offsets with C-level iterators: the k-th newline of a chunk at pos
+        # sits after k earlier newlines and the text of the first k + 1 lines
+        offsets = array('q')
+        for pos in range(0, len(data), SCAN_CHUNK_SIZE):
+            lines = data[pos:pos + SCAN_CHUNK_SIZE].split(b'\n')
+            lines.pop()
+            offsets.extend(map(add, accumulate(map(len, lines)), count(base + pos)))
+        return offsets
+        
+    def _get_index(self):
+        # Document offset and number of preceding line breaks at the start of each piece
+        if self._index is None:
+            starts = [0]
+            lines = [0]
+            for piece in self.pieces:
+                starts.append(starts[-1] + piece.length)
+                lines.append(lines[-1] + piece.newlines)
+            self._index = (starts, lines)
+        return self._index
+        
+    def _changed(self, y, lines_moved):
+        # Drop the piece index and any cached line the edit at line y affected
+        self._index = None
+        self.version += 1
+        if lines_moved:
+            for k in [k for k in self._lines if k >= y]:
+                del self._lines[k]
+        else:
+            self._lines.pop(y, None)
+        
+    def _count_newlines(self, source, start, end):
+        newlines = self._newlines[source]
+        return bisect_left(newlines, end) - bisect_left(newlines, start)
+        
+    def _read(self, start, end):
+        starts = self._get_index()[0]
+        i = bisect_right(starts, start) - 1
+        parts = []
+        while start < end:
+            piece = self.pieces[i]
+            lo = start - starts[i]
+            hi = min(end - starts[i], piece.length)
+            parts.append(self._sources[piece.source][piece.start + lo:piece.start + hi])
+            start = starts[i] + hi
+            i += 1
+        return b''.join(parts)
+        
+    def _line_start(self, y):
+        if y == 0:
+            return 0
+        starts, lines = self._get_index()
+        # Piece i holds the y-th line break
+        i = bisect_left(lines, y) - 1
+        piece = self.pieces[i]
+        newlines = self._newlines[piece.source]
+        k = bisect_left(newlines, piece.start) + y - lines[i] - 1
+        return starts[i] + newlines[k] - piece.start + 1
+        
+    def _line_bounds(self, y):
+        # (start of line, end of its text, start of the next line)
+        start = self._line_start(y)
+        if y + 1 < self.line_count():
+            next_start = self._line_start(y + 1)
+            end = next_start - 1
+            if end > start and self._read(end - 1, end) == b'\r':
+                end -= 1
+        else:
+            next_start = end = self._get_index()[0][-1]
+        return start, end, next_start
+        
+    def _offset(self, y, x):
+        offset = self._line_start(y)
+        if x:
+            line = self.get_line(y)
+            # Characters and bytes coincide on ASCII lines; columns past the
+            # end (a selection end left behind by an edit) clamp to it
+            if line.isascii():
+                offset += min(x, len(line))
+            else:
+                offset += len(line[:x].encode('utf-8', 'surrogateescape'))
+        return offset
+        
+    def _insert_bytes(self, offset, data):
+        if not data:
+            return
+        add_start = len(self._add)
+        self._add += data
+        self._newlines[ADD].extend(self._scan_newlines(data, add_start))
+        new = Piece(ADD, add_start, len(data), data.count(b'\n'))
+        
+        pieces = self.pieces
+        starts = self._get_index()[0]
+        i = bisect_left(starts, offset)
+        if starts[i] == offset:
+            # Between two pieces: grow the previous piece when typing at its end
+            prev = pieces[i - 1] if i > 0 else None
+            if prev and prev.source == ADD and prev.start + prev.length == add_start:
+                pieces[i - 1] = Piece(ADD, prev.start, prev.length + new.length, prev.newlines + new.newlines)
+            else:
+                pieces.insert(i, new)
+        else:
+            # Inside piece i - 1: split it around the new text
+            piece = pieces[i - 1]
+            split = offset - starts[i - 1]
+            left = Piece(piece.source, piece.start, split,
+                         self._count_newlines(piece.source, piece.start, piece.start + split))
+            right = Piece(piece.source, piece.start + split, piece.length - split,
+                          piece.newlines - left.newlines)
+            pieces[i - 1:i] = [left, new, right]
+        
+    def _delete_bytes(self, start, end):
+        if start >= end:
+            return
+        starts = self._get_index()[0]
+        i = bisect_right(starts, start) - 1
+        j = bisect_left(starts, end) - 1
+        kept = []
+        
+        first = self.pieces[i]
+        cut = start - starts[i]
+        if cut:
+            kept.append(Piece(first.source, first.start, cut,
+                              self._count_newlines(first.source, first.start, first.start + cut)))
+            
+        last = self.pieces[j]
+        cut = end - starts[j]
+        if cut < last.length:
+            kept.append(Piece(last.source, last.start + cut, last.length - cut,
+                              self._count_newlines(last.source, last.start + cut, last.start + last.length)))
+            
+        self.pieces[i:j + 1] = kept
+        
+    def line_count(self):
+        return self._get_index()[1][-1] + 1
+        
+    def get_line(self, y):
+        line = self._lines.get(y)
+        if line is None:
+            start, end, _ = self._line_bounds(y)
+            line = self._read(start, end).decode('utf-8', 'surrogateescape')
+            if len(self._lines) >= LINE_CACHE_SIZE:
+                self._lines.clear()
+            self._lines[y] = line
+        return line
+        
+    def line_len(self, y):
+        return len(self.get_line(y))
+        
+    def get_text(self, start_y, start_x, end_y, end_x):
+        # Text from (start_y, start_x) up to (end_y, end_x), with '\n' line breaks
+        data = self._read(self._offset(start_y, start_x), self._offset(end_y, end_x))
+        if self.newline != b'\n':
+            data = data.replace(self.newline, b'\n')
+        return data.decode('utf-8', 'surrogateescape')
+        
+    def insert(self, y, x, text):
+        data = text.encode('utf-8', 'surrogateescape')
+        lines_moved = b'\n' in data
+        if lines_moved and self.newline != b'\n':
+            data = data.replace(b'\n', self.newline)
+        self._insert_bytes(self._offset(y, x), data)
+        self._changed(y, lines_moved)
+        
+    def delete(self, y, x, n=1):
+        # Delete n characters of line y starting at column x
+        line = self.get_line(y)
+        start = self._offset(y, x)
+        if line.isascii():
+            end = start + len(line[x:x + n])
+        else:
+            end = start + len(line[x:x + n].encode('utf-8', 'surrogateescape'))
+        self._delete_bytes(start, end)
+        self._changed(y, False)
+        
+    def split_line(self, y, x):
+        self._insert_bytes(self._offset(y, x), self.newline)
+        self._changed(y, True)
+        
+    def join_line(self, y):
+        # Remove the line break between line y and the next one
+        _, end, next_start = self._line_bounds(y)
+        self._delete_bytes(end, next_start)
+        self._changed(y, True)
+        
+    def chunks(self, pieces=None):
+        # Yield the document in slices of at most WRITE_CHUNK_SIZE bytes. The
+        # original is sliced through a memoryview so it is never copied; the
+        # add buffer is copied instead, since exporting a view would stop it
+        # from growing while a background save runs.
+        original = memoryview(self._original)
+        try:
+            for piece in self.pieces if pieces is None else pieces:
+                source = original if piece.source == ORIGINAL else self._add
+                end = piece.start + piece.length
+                for start in range(piece.start, end, WRITE_CHUNK_SIZE):
+                    yield source[start:min(start + WRITE_CHUNK_SIZE, end)]
+        finally:
+            original.release()
+            
+    def _write_file(self, fd, pieces):
+        size = sum(piece.length for piece in (self.pieces if pieces is None else pieces))
+        if size >= PREALLOCATE_SIZE and hasattr(os, 'posix_fallocate'):
+            # Allocate the file in one go; not every filesystem can
+            try:
+                os.posix_fallocate(fd, 0, size)
+            except OSError:
+                pass
+        write_chunks(fd, self.chunks(pieces))
+        os.fsync(fd)
+        
+    def _write_in_place(self, filename, stat, pieces, reason):
+        # Truncate and rewrite the file itself, which is only safe when the
+        # text is not mapped from it
+        if self.file_id == (stat.st_dev, stat.st_ino):
+            raise OSError(f"{filename} {reason} and is too large to hold in memory; "
+                          "saving it in place could corrupt the open buffer")
+        fd = os.open(filename, os.O_WRONLY | os.O_TRUNC)
+        try:
+            self._write_file(fd, pieces)
+        finally:
+            os.close(fd)
+            
+    @staticmethod
+    def _copy_owner(path, stat):
+        # Give path the owner and group in stat; False if that is not permitted
+        current = os.stat(path)
+        if (current.st_uid, current.st_gid) == (stat.st_uid, stat.st_gid):
+            return True
+        try:
+            os.chown(path, stat.st_uid, stat.st_gid)
+        except OSError:
+            return False
+        return True
+        
+    def save(self, filename, pieces=None):
+        # Write to a temporary file and rename it over the target: the
+        # original text may be mapped from that file and must not be
+        # truncated while it is still in use. Sources are never modified
+        # in place, so a saved copy of `pieces` can be written from another
+        # thread while editing continues. Symlinks are followed so the file
+        # they point at is the one replaced. Where a rename would change
+        # more than the contents, the file is rewritten in place instead.
+        filename = os.path.realpath(filename)
+        try:
+            stat = os.stat(filename)
+        except FileNotFoundError:
+            stat = None
+            
+        if stat is not None:
+            # The rename only needs the directory to be writable; refuse a
+            # file the user could not have written directly
+            if not os.access(filename, os.W_OK):
+                raise PermissionError(errno.EACCES, os.strerror(errno.EACCES), filename)
+            # Renaming a new file into place would split the hard link
+            if stat.st_nlink > 1:
+                self._write_in_place(filename, stat, pieces, "has other hard links")
+                return
+                
+        try:
+            fd, tmp = tempfile.mkstemp(dir=os.path.dirname(filename), prefix='.cedit-', suffix='.tmp')
+        except PermissionError:
+            if stat is None:
+                # Report the file being saved rather than the temporary name
+                raise PermissionError(errno.EACCES, os.strerror(errno.EACCES), filename) from None
+            self._write_in_place(filename, stat, pieces, "is in a directory that cannot be written")
+            return
+            
+        try:
+            try:
+                # The rename must not reach the disk before the data does
+                self._write_file(fd, pieces)
+            finally:
+                os.close(fd)
+            # chown can clear the mode's set-id bits, so it goes first
+            if stat is None or self._copy_owner(tmp, stat):
+                if stat is not None:
+                    mode = stat.st_mode & 0o7777
+                else:
+                    mode = 0o666 & ~UMASK
+                os.chmod(tmp, mode)
+                os.replace(tmp, filename)
+                return
+        except BaseException:
+            os.unlink(tmp)
+            raise
+            
+        # Replacing the file would hand it over to the user saving it
+        os.unlink(tmp)
+        self._write_in_place(filename, stat, pieces, "belongs to another user")
 
 class TextEditor:
     def __init__(self, stdscr, filename=None):
         self.stdscr = stdscr
         self.filename = filename
-        self.content = []
+        self.content = PieceTable()
         self.cursor_y = 0
         self.cursor_x = 0
         self.scroll_y = 0
@@ -22,32 +539,119 @@ class TextEditor:
         self.clipboard = ""
         self.message = ""
         self.message_timeout = 0
+        # Set whenever the screen needs to be redrawn
+        self._dirty = True
+        # Buffer lines whose screen row must be repainted
+        self._dirty_lines = set()
+        # Viewport the screen was last drawn for; None forces a full repaint
+        self._drawn_view = None
+        # Inputs of the status line as last drawn
+        self._drawn_status = None
         
-        # Initialize colors
+        # Syntax highlighting objects are created on the first Python render
+        # and reused after that; Pygments is only imported then
+        self._py_lexer = None
+        self._py_style = None
+        # (_TokenType, Error) for lex_line, or None to lex lines independently
+        self._lex_types = None
+        # Whether the current file is highlighted as Python
+        self._use_python = False
+        # Curses attribute for each token type, filled in by _init_highlighter
+        self._token_attrs = {}
+        # (state, line) -> ((attr, text) spans, state at the end of the line),
+        # least recently used first
+        self._line_hl = OrderedDict()
+        # Lexer state at the start of each buffer line; entries from
+        # _hl_valid on are left over from before the last edit
+        self._hl_states = [ROOT_STATE]
+        self._hl_valid = 1
+        # Clipboard module, imported on first copy or paste
+        self._pyperclip = None
+        
+        # Initialize colors; pairs are allocated as token colors are first used
         curses.start_color()
         curses.use_default_colors()
-        for i in range(0, curses.COLORS):
-            curses.init_pair(i + 1, i, -1)
+        self._color_pairs = {}
+        self._sync_output = supports_sync_output()
+        
+        # File I/O runs on a single worker thread so jobs finish in order
+        self._io = ThreadPoolExecutor(max_workers=1)
+        self._io_jobs = []
+        self._loading = False
+        # Keys pressed while a file loads, replayed once its buffer is in place
+        self._pending_keys = []
+        # (filename, file_stat, version) of the loaded file while the buffer is unedited
+        self._loaded = None
+        
+        # Key code -> handler, built once instead of walking an if/elif chain per key
+        self._keymap = self._build_keymap()
             
         # Load file if provided
         if filename:
             self.load_file(filename)
-        else:
-            self.content = [""]
             
+    def _submit_io(self, fn, args, done):
+        # Run fn(*args) on the I/O thread and call done(future) from the main loop
+        self._io_jobs.append((self._io.submit(fn, *args), done))
+        
+    def poll_io(self):
+        while self._io_jobs and self._io_jobs[0][0].done():
+            future, done = self._io_jobs.pop(0)
+            done(future)
+            
+    def _replace_content(self, content):
+        # Close the old buffer only after any save still reading from it
+        self._io.submit(self.content.close)
+        self.content = content
+        self.cursor_y = 0
+        self.cursor_x = 0
+        self.scroll_y = 0
+        self.scroll_x = 0
+        self.selection_start = None
+        self._loaded = None
+        self._hl_states = [ROOT_STATE]
+        self._hl_valid = 1
+        self._redraw_all()
+        
     def load_file(self, filename):
+        # Opening the file that is already loaded, with no edits since and
+        # unchanged on disk, would only rebuild the same buffer
+        if self._loaded is not None and self._loaded[0] == filename and self._loaded[2] == self.content.version:
+            try:
+                stat = os.stat(filename)
+            except OSError:
+                pass
+            else:
+                if (stat.st_mtime_ns, stat.st_size) == self._loaded[1]:
+                    self.set_message(f"Already open: {filename}")
+                    return
+                    
+        # Mapping and indexing the file happens off the main loop; keys are
+        # held back until the new buffer is in place
+        self._loading = True
+        self.set_message(f"Loading {filename}...")
+        self._submit_io(PieceTable.from_file, (filename,), lambda future: self._apply_file(filename, future))
+        
+    def _apply_file(self, filename, future):
+        self._loading = False
+        self.message = ""
+        self.message_timeout = 0
         try:
-            with open(filename, 'r') as f:
-                self.content = f.read().splitlines()
-                if not self.content:
-                    self.content = [""]
+            self._replace_content(future.result())
+            self._loaded = (filename, self.content.file_stat, self.content.version)
         except FileNotFoundError:
-            self.content = [""]
+            self._replace_content(PieceTable())
             self.set_message(f"New file: {filename}")
         except Exception as e:
-            self.content = [""]
+            self._replace_content(PieceTable())
             self.set_message(f"Error loading file: {str(e)}")
             
+        # Apply what was typed during the load; a key that starts another
+        # load queues the rest again
+        keys, self._pending_keys = self._pending_keys, []
+        for key in keys:
+            self.handle_input(key)
+            
     def save_file(self, filename=None):
         if filename:
             self.filename = filename
@@ -56,26 +660,49 @@ class TextEditor:
             self.set_message("No filename specified")
             return False
             
+        # Write a snapshot of the pieces in the background
+        filename = self.filename
+        self.set_message(f"Saving {filename}...")
+        self._submit_io(self.content.save, (filename, list(self.content.pieces)),
+                        lambda future: self._saved(filename, future))
+        return True
+        
+    def _saved(self, filename, future):
         try:
-            with open(self.filename, 'w') as f:
-                f.write('\n'.join(self.content))
-            self.set_message(f"Saved: {self.filename}")
-            return True
+            future.result()
+            self.set_message(f"Saved: {filename}")
         except Exception as e:
             self.set_message(f"Error saving file: {str(e)}")
-            return False
             
     def set_message(self, message, timeout=50):
         self.message = message
         self.message_timeout = timeout
+        self._dirty = True
+        
+    def _touch_lines(self, start, stop=None):
+        # Mark buffer lines [start, stop) for repaint, down to the bottom of the screen by default
+        if stop is None:
+            stop = self.scroll_y + self.height - 2
+        self._dirty_lines.update(range(start, stop))
+        # Lexer states after the first changed line have to be recomputed
+        if start + 1 < self._hl_valid:
+            self._hl_valid = start + 1
+        self._dirty = True
+        
+    def _redraw_all(self):
+        self._drawn_view = None
+        self._dirty = True
+        
+    def tick_message(self):
+        # Count down the message and repaint once it expires
+        if self.message_timeout > 0:
+            self.message_timeout -= 1
+            if self.message_timeout == 0:
+                self._dirty = True
             
     def new_file(self):
         self.filename = None
-        self.content = [""]
-        self.cursor_y = 0
-        self.cursor_x = 0
-        self.scroll_y = 0
-        self.scroll_x = 0
+        self._replace_content(PieceTable())
         self.set_message("New file")
         
     def prompt_filename(self, action):
@@ -88,131 +715,160 @@ class TextEditor:
         prompt = f"{action} file: "
         self.stdscr.addstr(self.height - 1, 0, prompt)
         
-        # Get input
+        # Get input, blocking until the line is entered
+        self.stdscr.timeout(-1)
         curses.echo()
         filename = self.stdscr.getstr(self.height - 1, len(prompt)).decode('utf-8')
         curses.noecho()
         
-        # Restore cursor
+        # Restore cursor and repaint over the prompt
         self.cursor_y, self.cursor_x = cursor_y, cursor_x
+        self._dirty = True
         
         return filename if filename else None
         
+    def _build_keymap(self):
+        return {
+            # Standard navigation
+            KEY_UP: lambda: self.move_cursor(-1, 0),
+            KEY_DOWN: lambda: self.move_cursor(1, 0),
+            KEY_LEFT: lambda: self.move_cursor(0, -1),
+            KEY_RIGHT: lambda: self.move_cursor(0, 1),
+            KEY_HOME: self._home,
+            KEY_END: self._end,
+            KEY_PPAGE: lambda: self.move_cursor(-self.height + 2, 0),  # Page Up
+            KEY_NPAGE: lambda: self.move_cursor(self.height - 2, 0),  # Page Down
+            
+            # Editing
+            10: self._enter,  # Enter
+            9: lambda: self.insert_text(TAB_SPACES),  # Tab inserts 4 spaces
+            127: self._backspace,  # Backspace
+            KEY_BACKSPACE: self._backspace,
+            KEY_DC: self._delete,  # Delete
+            
+            # Selection
+            KEY_SR: lambda: self._extend_selection(-1),  # Shift+Up
+            KEY_SF: lambda: self._extend_selection(1),  # Shift+Down
+            
+            # Control commands using control characters
+            19: self.save_file,  # Ctrl+S
+            15: self._open_prompt,  # Ctrl+O
+            14: self.new_file,  # Ctrl+N
+            3: self.copy_text,  # Ctrl+C
+            22: self.paste_text,  # Ctrl+V
+            27: self._clear_selection,  # Escape
+        }
+        
     def handle_input(self, key):
-        if key == curses.KEY_RESIZE:
+        if key == KEY_RESIZE:
             self.height, self.width = self.stdscr.getmaxyx()
+            self._dirty = True
             return
             
-        # Standard navigation
-        if key == curses.KEY_UP:
-            self.move_cursor(-1, 0)
-        elif key == curses.KEY_DOWN:
-            self.move_cursor(1, 0)
-        elif key == curses.KEY_LEFT:
-            self.move_cursor(0, -1)
-        elif key == curses.KEY_RIGHT:
-            self.move_cursor(0, 1)
-        elif key == curses.KEY_HOME:
-            self.cursor_x = 0
-        elif key == curses.KEY_END:
-            self.cursor_x = len(self.content[self.cursor_y])
-        elif key == curses.KEY_PPAGE:  # Page Up
-            self.move_cursor(-self.height + 2, 0)
-        elif key == curses.KEY_NPAGE:  # Page Down
-            self.move_cursor(self.height - 2, 0)
-            
-        # Editing
-        elif key == 10:  # Enter
-            # Split the line at cursor
-            current_line = self.content[self.cursor_y]
-            self.content[self.cursor_y] = current_line[:self.cursor_x]
-            self.content.insert(self.cursor_y + 1, current_line[self.cursor_x:])
-            self.cursor_y += 1
-            self.cursor_x = 0
-        elif key == 9:  # Tab
-            # Insert 4 spaces
-            self.insert_text("    ")
-        elif key == 127 or key == curses.KEY_BACKSPACE:  # Backspace
-            if self.cursor_x > 0:
-                current_line = self.content[self.cursor_y]
-                self.content[self.cursor_y] = current_line[:self.cursor_x-1] + current_line[self.cursor_x:]
-                self.cursor_x -= 1
-            elif self.cursor_y > 0:
-                # Join with previous line
-                self.cursor_x = len(self.content[self.cursor_y-1])
-                self.content[self.cursor_y-1] += self.content[self.cursor_y]
-                self.content.pop(self.cursor_y)
-                self.cursor_y -= 1
-        elif key == curses.KEY_DC:  # Delete
-            if self.cursor_x < len(self.content[self.cursor_y]):
-                current_line = self.content[self.cursor_y]
-                self.content[self.cursor_y] = current_line[:self.cursor_x] + current_line[self.cursor_x+1:]
-            elif self.cursor_y < len(self.content) - 1:
-                # Join with next line
-                self.content[self.cursor_y] += self.content[self.cursor_y+1]
-                self.content.pop(self.cursor_y+1)
-        
-        # Selection
-        elif key == curses.KEY_SR or key == curses.KEY_SF:  # Shift+Up/Down
-            if self.selection_start is None:
-                self.selection_start = (self.cursor_y, self.cursor_x)
-            
-            if key == curses.KEY_SR:  # Shift+Up
-                self.move_cursor(-1, 0)
-            else:  # Shift+Down
-                self.move_cursor(1, 0)
-                
-        # Control commands using control characters
-        elif key == 19:  # Ctrl+S
-            self.save_file()
-        elif key == 15:  # Ctrl+O
-            filename = self.prompt_filename("Open")
-            if filename:
-                self.filename = filename
-                self.load_file(filename)
-        elif key == 14:  # Ctrl+N
-            self.new_file()
-        elif key == 3:  # Ctrl+C
-            self.copy_text()
-        elif key == 22:  # Ctrl+V
-            self.paste_text()
-        elif key == 27:  # Escape
-            self.selection_start = None
-            
-        # Default - insert character
+        # The buffer is about to be replaced; keep the key for the new one
+        if self._loading:
+            self._pending_keys.append(key)
+            return
+            
+        action = self._keymap.get(key)
+        if action:
+            action()
         elif 32 <= key <= 126:  # Printable characters
             self.insert_text(chr(key))
+        else:
+            return
+        # Keep the cursor on screen after typing, Enter or a join
+        self.update_scroll()
+            
+    def _home(self):
+        # Only the cursor and status line change unless the view has to scroll
+        self.cursor_x = 0
+        self._dirty = True
+        
+    def _end(self):
+        self.cursor_x = self.content.line_len(self.cursor_y)
+        self._dirty = True
+        
+    def _enter(self):
+        # Split the line at cursor
+        self._touch_lines(self.cursor_y)
+        self.content.split_line(self.cursor_y, self.cursor_x)
+        self.cursor_y += 1
+        self.cursor_x = 0
+        
+    def _backspace(self):
+        if self.cursor_x > 0:
+            self._touch_lines(self.cursor_y, self.cursor_y + 1)
+            self.content.delete(self.cursor_y, self.cursor_x - 1)
+            self.cursor_x -= 1
+        elif self.cursor_y > 0:
+            # Join with previous line
+            self._touch_lines(self.cursor_y - 1)
+            self.cursor_x = self.content.line_len(self.cursor_y - 1)
+            self.content.join_line(self.cursor_y - 1)
+            self.cursor_y -= 1
+            
+    def _delete(self):
+        if self.cursor_x < self.content.line_len(self.cursor_y):
+            self._touch_lines(self.cursor_y, self.cursor_y + 1)
+            self.content.delete(self.cursor_y, self.cursor_x)
+        elif self.cursor_y < self.content.line_count() - 1:
+            # Join with next line
+            self._touch_lines(self.cursor_y)
+            self.content.join_line(self.cursor_y)
+            
+    def _extend_selection(self, dy):
+        if self.selection_start is None:
+            self.selection_start = (self.cursor_y, self.cursor_x)
+            self._dirty = True
+        self.move_cursor(dy, 0)
+        
+    def _clear_selection(self):
+        self.selection_start = None
+        self._dirty = True
+        
+    def _open_prompt(self):
+        filename = self.prompt_filename("Open")
+        if filename:
+            self.filename = filename
+            self.load_file(filename)
             
     def insert_text(self, text):
-        current_line = self.content[self.cursor_y]
-        self.content[self.cursor_y] = current_line[:self.cursor_x] + text + current_line[self.cursor_x:]
+        self._touch_lines(self.cursor_y, self.cursor_y + 1)
+        self.content.insert(self.cursor_y, self.cursor_x, text)
         self.cursor_x += len(text)
             
     def move_cursor(self, dy, dx):
+        old_position = (self.cursor_y, self.cursor_x, self.scroll_y, self.scroll_x)
+        
         if dy != 0:
             # Move up/down
-            new_y = max(0, min(len(self.content) - 1, self.cursor_y + dy))
+            new_y = max(0, min(self.content.line_count() - 1, self.cursor_y + dy))
             if new_y != self.cursor_y:
                 self.cursor_y = new_y
-                self.cursor_x = min(self.cursor_x, len(self.content[self.cursor_y]))
+                self.cursor_x = min(self.cursor_x, self.content.line_len(self.cursor_y))
                 
         if dx != 0:
             # Move left/right
             if dx < 0 and self.cursor_x == 0 and self.cursor_y > 0:
                 # Move to end of previous line
                 self.cursor_y -= 1
-                self.cursor_x = len(self.content[self.cursor_y])
-            elif dx > 0 and self.cursor_x == len(self.content[self.cursor_y]) and self.cursor_y < len(self.content) - 1:
+                self.cursor_x = self.content.line_len(self.cursor_y)
+            elif dx > 0 and self.cursor_x == self.content.line_len(self.cursor_y) and self.cursor_y < self.content.line_count() - 1:
                 # Move to start of next line
                 self.cursor_y += 1
                 self.cursor_x = 0
             else:
                 # Move within line
-                self.cursor_x = max(0, min(len(self.content[self.cursor_y]), self.cursor_x + dx))
+                self.cursor_x = max(0, min(self.content.line_len(self.cursor_y), self.cursor_x + dx))
                 
         # Update scroll if needed
         self.update_scroll()
         
+        # Only repaint if the cursor or viewport actually moved
+        if (self.cursor_y, self.cursor_x, self.scroll_y, self.scroll_x) != old_position:
+            self._dirty = True
+        
     def update_scroll(self):
         # Vertical scrolling
         if self.cursor_y < self.scroll_y:
@@ -230,127 +886,294 @@ class TextEditor:
         if self.selection_start is None:
             return ""
             
+        # The anchor may be below the last line if lines were joined since
         start_y, start_x = self.selection_start
+        start_y = min(start_y, self.content.line_count() - 1)
         end_y, end_x = self.cursor_y, self.cursor_x
         
         # Ensure start is before end
         if start_y > end_y or (start_y == end_y and start_x > end_x):
             start_y, start_x, end_y, end_x = end_y, end_x, start_y, start_x
         
-        selected_text = []
-        for y in range(start_y, end_y + 1):
-            line = self.content[y]
-            if start_y == end_y:
-                selected_text.append(line[start_x:end_x])
-            elif y == start_y:
-                selected_text.append(line[start_x:])
-            elif y == end_y:
-                selected_text.append(line[:end_x])
-            else:
-                selected_text.append(line)
-                
-        return '\n'.join(selected_text)
+        # One read across the pieces instead of a Python loop over every line
+        return self.content.get_text(start_y, start_x, end_y, end_x)
+        
+    def _clipboard(self):
+        if self._pyperclip is None:
+            import pyperclip
+            self._pyperclip = pyperclip
+        return self._pyperclip
         
     def copy_text(self):
         selected_text = self.get_selected_text()
         if selected_text:
             try:
-                pyperclip.copy(selected_text)
+                self._clipboard().copy(selected_text)
                 self.set_message("Text copied to clipboard")
             except Exception as e:
                 self.set_message(f"Failed to copy: {str(e)}")
                 
     def paste_text(self):
         try:
-            text = pyperclip.paste()
+            text = self._clipboard().paste().replace('\r\n', '\n').replace('\t', TAB_SPACES)
             if text:
-                lines = text.split('\n')
-                if len(lines) == 1:
+                breaks = text.count('\n')
+                if not breaks:
                     self.insert_text(text)
                 else:
-                    # Handle multi-line paste
-                    current_line = self.content[self.cursor_y]
-                    first_part = current_line[:self.cursor_x]
-                    last_part = current_line[self.cursor_x:]
-                    
-                    # Replace current line with first line of pasted text
-                    self.content[self.cursor_y] = first_part + lines[0]
-                    
-                    # Insert middle lines
-                    for i, line in enumerate(lines[1:-1], 1):
-                        self.content.insert(self.cursor_y + i, line)
-                        
-                    # Add last line of pasted text + remainder of current line
-                    self.content.insert(self.cursor_y + len(lines) - 1, lines[-1] + last_part)
-                    
-                    # Update cursor position
-                    self.cursor_y += len(lines) - 1
-                    self.cursor_x = len(lines[-1])
+                    # Handle multi-line paste: one insert into the buffer, and the
+                    # cursor lands after the last pasted line break
+                    self._touch_lines(self.cursor_y)
+                    self.content.insert(self.cursor_y, self.cursor_x, text)
+                    self.cursor_y += breaks
+                    self.cursor_x = len(text) - text.rfind('\n') - 1
                 self.set_message("Text pasted from clipboard")
         except Exception as e:
             self.set_message(f"Failed to paste: {str(e)}")
                 
-    def render(self):
-        self.stdscr.clear()
+    def _color_attr(self, color):
+        # Color pair attribute for a foreground color on the default background
+        attr = self._color_pairs.get(color)
+        if attr is None:
+            pair = len(self._color_pairs) + 1
+            if pair >= curses.COLOR_PAIRS:
+                return curses.A_NORMAL
+            curses.init_pair(pair, color, -1)
+            attr = self._color_pairs[color] = curses.color_pair(pair)
+        return attr
         
-        # Calculate visible lines
-        visible_lines = min(self.height - 2, len(self.content) - self.scroll_y)
+    def _style_attr(self, style):
+        # Curses attribute for a pygments style dict
+        attr = curses.A_NORMAL
+        if style['color'] and curses.COLORS >= 256:
+            attr |= self._color_attr(xterm_color(style['color']))
+        if style['bold']:
+            attr |= curses.A_BOLD
+        if style['italic']:
+            attr |= curses.A_ITALIC
+        if style['underline']:
+            attr |= curses.A_UNDERLINE
+        return attr
         
-        # Combine all visible lines for syntax highlighting
-        visible_content = '\n'.join(self.content[self.scroll_y:self.scroll_y + visible_lines])
+    def _token_attr(self, ttype):
+        # Token types missing from the precomputed map (lexer-specific subtypes)
+        attr = self._style_attr(self._py_style.style_for_token(ttype))
+        self._token_attrs[ttype] = attr
+        return attr
         
-        # Apply syntax highlighting
-        if self.filename and self.filename.endswith('.py'):
-            try:
-                # Apply Python syntax highlighting
-                style = get_style_by_name('monokai')
-                formatter = Terminal256Formatter(style=style)
-                highlighted = highlight(visible_content, PythonLexer(), formatter)
-                highlighted_lines = highlighted.splitlines()
-            except Exception:
-                # Fall back to no highlighting on error
-                highlighted_lines = visible_content.splitlines()
-        else:
-            # No syntax highlighting for non-Python files
-            highlighted_lines = visible_content.splitlines()
-            
-        # Display lines with highlighting
-        for i, line in enumerate(highlighted_lines):
-            if i < visible_lines:
-                try:
-                    self.stdscr.addstr(i, 0, line[self.scroll_x:self.scroll_x + self.width - 1])
-                except curses.error:
-                    # End of screen reached
-                    pass
-        
-        # Display status line
-        status = f" {self.filename or 'Untitled'} - {len(self.content)} lines | Ln {self.cursor_y + 1}, Col {self.cursor_x + 1} "
-        status = status + " " * (self.width - len(status) - 1)
+    def _highlight_line(self, state, line):
+        # Spans for a line starting in the given lexer state, and the state it ends in
+        key = (state, line)
+        cached = self._line_hl.get(key)
+        if cached is not None:
+            self._line_hl.move_to_end(key)
+            return cached
+            
+        try:
+            if self._lex_types is not None:
+                tokens, end_state = lex_line(self._py_lexer, line, state, *self._lex_types)
+            else:
+                tokens = [(ttype, value) for _, ttype, value
+                          in self._py_lexer.get_tokens_unprocessed(line + '\n')]
+                end_state = ROOT_STATE
+            # Merge consecutive tokens that share an attribute into one span
+            spans = []
+            token_attrs = self._token_attrs
+            for ttype, value in tokens:
+                value = value.rstrip('\n')
+                if not value:
+                    continue
+                attr = token_attrs.get(ttype)
+                if attr is None:
+                    attr = self._token_attr(ttype)
+                if spans and spans[-1][0] == attr:
+                    spans[-1] = (attr, spans[-1][1] + value)
+                else:
+                    spans.append((attr, value))
+        except Exception:
+            # Fall back to no highlighting on error
+            spans = [(curses.A_NORMAL, line)]
+            end_state = ROOT_STATE
+            
+        cached = self._line_hl[key] = (spans, end_state)
+        if len(self._line_hl) > HIGHLIGHT_CACHE_SIZE:
+            self._line_hl.popitem(last=False)
+        return cached
+        
+    def _line_state(self, y):
+        # Lexer state at the start of line y, lexing forward from the last
+        # line whose state is still known
+        states = self._hl_states
+        start = self._hl_valid - 1
+        if y > start:
+            if y - start > HIGHLIGHT_SYNC_LINES:
+                # Too far to lex everything in between; resync at the top level
+                states[start + 1:y - HIGHLIGHT_SYNC_LINES + 1] = [ROOT_STATE] * (y - HIGHLIGHT_SYNC_LINES - start)
+                start = y - HIGHLIGHT_SYNC_LINES
+            get_line = self.content.get_line
+            for i in range(start, y):
+                state = self._highlight_line(states[i], get_line(i))[1]
+                if i + 1 < len(states):
+                    states[i + 1] = state
+                else:
+                    states.append(state)
+            self._hl_valid = y + 1
+        return states[y]
+        
+    def _init_highlighter(self):
+        from pygments.lexers import PythonLexer
+        from pygments.styles import get_style_by_name
         
+        self._py_lexer = PythonLexer()
+        self._py_style = get_style_by_name('monokai')
+        # lex_line runs on RegexLexer internals; if a Pygments release changes
+        # them, fall back to lexing each line from the top level
         try:
-            self.stdscr.attron(curses.A_REVERSE)
-            self.stdscr.addstr(self.height - 2, 0, status[:self.width-1])
-            self.stdscr.attroff(curses.A_REVERSE)
-        except curses.error:
-            # Handle potential errors when terminal is resized
+            from pygments.token import Error, _TokenType
+        except ImportError:
             pass
+        else:
+            rules = getattr(self._py_lexer, '_tokens', None)
+            if isinstance(rules, dict) and 'root' in rules and all(len(rule) == 3 for rule in rules['root']):
+                self._lex_types = (_TokenType, Error)
+        # Resolve every token type in the style to its attribute up front so
+        # highlighting is a plain dict lookup per token
+        self._token_attrs = {
+            ttype: self._style_attr(style) for ttype, style in self._py_style
+        }
+        for line in COMMON_PYTHON_LINES:
+            self._highlight_line(ROOT_STATE, line)
+        
+    def _draw_spans(self, row, spans, addstr, left, right):
+        # Draw the part of the spans that falls inside columns [left, right)
+        col = 0
+        for attr, text in spans:
+            end = col + len(text)
+            if end > left:
+                start = col if col > left else left
+                addstr(row, start - left, text[start - col:right - col], attr)
+            col = end
+            if col >= right:
+                break
+                
+    def render(self):
+        # Nothing changed since the last frame
+        if not self._dirty:
+            return
+            
+        text_rows = self.height - 2
+        
+        # Scrolling, resizing or switching files invalidates every row
+        view = (self.scroll_y, self.scroll_x, self.height, self.width, self.filename)
+        if view != self._drawn_view:
+            self._drawn_view = view
+            self._drawn_status = None
+            self.stdscr.erase()
+            self._dirty_lines.update(range(self.scroll_y, self.scroll_y + text_rows))
+            # The filename is part of the view, so this is the only place the
+            # language can change
+            self._use_python = bool(self.filename) and self.filename.endswith('.py')
+            if self._use_python and self._py_lexer is None:
+                self._init_highlighter()
+        use_python = self._use_python
+        
+        # Bind everything the row loop touches to locals
+        stdscr = self.stdscr
+        move, clrtoeol, addstr = stdscr.move, stdscr.clrtoeol, stdscr.addstr
+        get_line, highlight_line, draw_spans = self.content.get_line, self._highlight_line, self._draw_spans
+        dirty_lines, states = self._dirty_lines, self._hl_states
+        scroll_y, height, width = self.scroll_y, self.height, self.width
+        left = self.scroll_x
+        right = left + width - 1
+        line_count = self.content.line_count()
+        
+        # Repaint only the rows that changed since the last frame, plus the
+        # rows below a changed line until the lexer state it ends in matches
+        # what the next line started in before
+        relex = False
+        for y in range(scroll_y, scroll_y + text_rows):
+            if not relex and y not in dirty_lines:
+                continue
+            relex = False
+            try:
+                move(y - scroll_y, 0)
+                clrtoeol()
+                if y < line_count:
+                    line = get_line(y)
+                    # Apply syntax highlighting line by line so unchanged lines hit the cache
+                    if use_python:
+                        spans, state = highlight_line(self._line_state(y), line)
+                        if y + 1 < len(states):
+                            relex = states[y + 1] != state
+                            states[y + 1] = state
+                        else:
+                            states.append(state)
+                        if self._hl_valid < y + 2:
+                            self._hl_valid = y + 2
+                    else:
+                        spans = ((curses.A_NORMAL, line),)
+                    draw_spans(y - scroll_y, spans, addstr, left, right)
+            except curses.error:
+                # End of screen reached
+                pass
+        dirty_lines.clear()
+        
+        # Display status line, rebuilding it only when something in it changed
+        cursor_y, cursor_x = self.cursor_y, self.cursor_x
+        status_key = (self.filename, line_count, cursor_y, cursor_x)
+        if status_key != self._drawn_status:
+            self._drawn_status = status_key
+            status = f" {self.filename or 'Untitled'} - {line_count} lines | Ln {cursor_y + 1}, Col {cursor_x + 1} "
+            status = status + " " * (width - len(status) - 1)
             
-        # Display message if any
-        if self.message and self.message_timeout > 0:
             try:
-                self.stdscr.addstr(self.height - 1, 0, self.message[:self.width-1])
-                self.message_timeout -= 1
+                addstr(height - 2, 0, status[:width-1], curses.A_REVERSE)
             except curses.error:
+                # Handle potential errors when terminal is resized
                 pass
+            
+        # Display message if any
+        try:
+            move(height - 1, 0)
+            clrtoeol()
+            if self.message and self.message_timeout > 0:
+                addstr(height - 1, 0, self.message[:width-1])
+        except curses.error:
+            pass
                 
         # Position cursor
         try:
-            self.stdscr.move(self.cursor_y - self.scroll_y, min(self.width - 1, self.cursor_x - self.scroll_x))
+            move(cursor_y - scroll_y, min(width - 1, cursor_x - left))
         except curses.error:
             # Handle potential errors when terminal is resized
             pass
             
-        self.stdscr.refresh()
+        self._dirty = False
+        stdscr.noutrefresh()
+        
+        # Flush the whole frame at once, inside a synchronized update if possible
+        if self._sync_output:
+            sys.stdout.write(SYNC_BEGIN)
+            sys.stdout.flush()
+        curses.doupdate()
+        if self._sync_output:
+            sys.stdout.write(SYNC_END)
+            sys.stdout.flush()
+        
+    def handle_keys(self, key):
+        # Handle the key and every key already queued behind it, so a burst
+        # of input (fast typing, a terminal paste) is followed by one render.
+        # Returns False once Ctrl+Q is pressed.
+        while key != -1:
+            # Check for exit (Ctrl+Q)
+            if key == 17:  # Ctrl+Q
+                return False
+                
+            self.tick_message()
+            self.handle_input(key)
+            self.stdscr.timeout(0)
+            key = self.stdscr.getch()
+        return True
         
     def run(self):
         curses.curs_set(1)  # Show cursor
@@ -358,19 +1181,20 @@ class TextEditor:
         self.stdscr.keypad(True)  # Enable special keys
         
         while True:
+            self.poll_io()
             self.render()
             
             try:
-                key = self.stdscr.getch()
-                
-                # Check for exit (Ctrl+Q)
-                if key == 17:  # Ctrl+Q
+                # Wake up periodically while file I/O is pending
+                self.stdscr.timeout(IO_POLL_MS if self._io_jobs else -1)
+                if not self.handle_keys(self.stdscr.getch()):
                     break
-                    
-                self.handle_input(key)
             except KeyboardInterrupt:
                 break
                 
+        # Let pending saves finish before exiting
+        self._io.shutdown(wait=True)
+                
 def main(stdscr):
     # Setup terminal
     curses.raw()
@@ -0,0 +1,103 @@
+import os
+import random
+import tempfile
+import unittest
+
+from claude import PieceTable
+
+
+class PieceTableTest(unittest.TestCase):
+    # PieceTable is checked against a plain list of lines that gets the same edits
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def load(self, lines, newline):
+        path = os.path.join(self.tmp.name, 'in.txt')
+        with open(path, 'wb') as f:
+            f.write(newline.join(lines).encode('utf-8'))
+        table = PieceTable.from_file(path)
+        self.addCleanup(table.close)
+        return table
+
+    def check(self, table, lines, newline):
+        self.assertEqual(table.line_count(), len(lines))
+        for y, line in enumerate(lines):
+            self.assertEqual(table.get_line(y), line)
+            self.assertEqual(table.line_len(y), len(line))
+        self.assertEqual(b''.join(table.chunks()).decode('utf-8'), newline.join(lines))
+
+    def random_edits(self, newline, rng):
+        lines = [''.join(rng.choice('ab é') for _ in range(rng.randint(0, 8)))
+                 for _ in range(rng.randint(2, 8))]
+        table = self.load(lines, newline)
+        for _ in range(100):
+            y = rng.randrange(len(lines))
+            x = rng.randint(0, len(lines[y]))
+            op = rng.random()
+            if op < 0.35:
+                text = ''.join(rng.choice('xyz€') for _ in range(rng.randint(1, 3)))
+                if rng.random() < 0.2:
+                    text += '\nq'
+                table.insert(y, x, text)
+                lines[y:y + 1] = (lines[y][:x] + text + lines[y][x:]).split('\n')
+            elif op < 0.55:
+                table.split_line(y, x)
+                lines[y:y + 1] = [lines[y][:x], lines[y][x:]]
+            elif op < 0.8:
+                if x < len(lines[y]):
+                    n = rng.randint(1, len(lines[y]) - x)
+                    table.delete(y, x, n)
+                    lines[y] = lines[y][:x] + lines[y][x + n:]
+            elif y + 1 < len(lines):
+                table.join_line(y)
+                lines[y:y + 2] = [lines[y] + lines[y + 1]]
+            self.check(table, lines, newline)
+        return table, lines
+
+    def test_random_edits(self):
+        rng = random.Random(0)
+        for newline in ('\n', '\r\n'):
+            for _ in range(10):
+                with self.subTest(newline=newline):
+                    self.random_edits(newline, rng)
+
+    def test_get_text(self):
+        rng = random.Random(1)
+        for newline in ('\n', '\r\n'):
+            for _ in range(20):
+                table, lines = self.random_edits(newline, rng)
+                text = '\n'.join(lines)
+
+                def offset(y, x):
+                    return sum(len(line) + 1 for line in lines[:y]) + x
+
+                y0 = rng.randrange(len(lines))
+                x0 = rng.randint(0, len(lines[y0]))
+                y1 = rng.randrange(y0, len(lines))
+                x1 = rng.randint(x0 if y1 == y0 else 0, len(lines[y1]))
+                self.assertEqual(table.get_text(y0, x0, y1, x1), text[offset(y0, x0):offset(y1, x1)])
+
+    def test_get_text_clamps_columns_past_line_end(self):
+        table = self.load(['alpha', 'be', 'gamma'], '\n')
+        self.assertEqual(table.get_text(1, 1, 1, 10), 'e')
+        self.assertEqual(table.get_text(0, 3, 1, 10), 'ha\nbe')
+
+    def test_save_round_trip(self):
+        rng = random.Random(2)
+        for newline in ('\n', '\r\n'):
+            table, lines = self.random_edits(newline, rng)
+            path = os.path.join(self.tmp.name, 'out.txt')
+            table.save(path)
+            with open(path, 'rb') as f:
+                self.assertEqual(f.read().decode('utf-8'), newline.join(lines))
+
+    def test_new_lines_keep_crlf(self):
+        table = self.load(['one', 'two'], '\r\n')
+        table.split_line(0, 1)
+        self.assertEqual(b''.join(table.chunks()), b'o\r\nne\r\ntwo')
+
+
+if __name__ == '__main__':
+    unittest.main()